@@ -13,8 +13,6 @@
 #include <inttypes.h>  // Para usar PRIx32
 #include <stdint.h>
 
-typedef void (*bar_func_ptr)(uint32_t);  // Para punteros a funciones CSR
-
 /*-----------------------------------------------------------------------*/
 /* UART                                                                  */
 /*-----------------------------------------------------------------------*/
@@ -148,17 +146,30 @@ static void donut_cmd(void)
 }
 
 
+/* Escribe el inicio de cada franja en el CSR bars_starts: un campo de
+ * CSR_BARS_STARTS_START_0_SIZE bits por franja, la franja 0 en los bits bajos.
+ * El CSR ocupa CSR_BARS_STARTS_SIZE palabras de 32 bits, la más significativa primero. */
+static void bars_starts_write_all(const uint32_t *starts, int count)
+{
+	uint32_t words[CSR_BARS_STARTS_SIZE] = {0};
+	uint32_t mask = (1u << CSR_BARS_STARTS_START_0_SIZE) - 1;
+
+	for (int i = 0; i < count; i++) {
+		int bit = i * CSR_BARS_STARTS_START_0_SIZE;
+		int w   = CSR_BARS_STARTS_SIZE - 1 - bit / 32;
+		uint64_t v = (uint64_t)(starts[i] & mask) << (bit % 32);
+		words[w] |= (uint32_t)v;
+		if (w > 0)
+			words[w - 1] |= (uint32_t)(v >> 32);  // Campo partido entre dos palabras
+	}
+	csr_wr_buf_uint32(CSR_BARS_STARTS_ADDR, words, CSR_BARS_STARTS_SIZE);
+}
+
 static void helloc_cmd(void)
 {
 	printf("Hello C demo... (press 'q' to stop)\n");
 
-	bar_func_ptr bar_writes[16] = {
-		bars_start_0_write, bars_start_1_write, bars_start_2_write, bars_start_3_write,
-		bars_start_4_write, bars_start_5_write, bars_start_6_write, bars_start_7_write,
-		bars_start_8_write, bars_start_9_write, bars_start_10_write, bars_start_11_write,
-		bars_start_12_write, bars_start_13_write, bars_start_14_write, bars_start_15_write
-	};
-
+	uint32_t starts[16];
 	int offset = 0;
 	while (1) {
 		if (readchar_nonblock()) {
@@ -167,8 +178,9 @@ static void helloc_cmd(void)
 		}
 
 		for (int i = 0; i < 16; i++) {
-			bar_writes[i]((i * 40 + offset) % 640);
+			starts[i] = (i * 40 + offset) % 640;
 		}
+		bars_starts_write_all(starts, 16);
 		offset = (offset + 1) % 640;
 
 		for (volatile int j = 0; j < 100000; j++);
@@ -1,20 +1,61 @@
+import os
+import numpy as np
 from PIL import Image
 
-def convert_logo_to_mem(input_path, output_path, bg_color=(0, 0, 0)):
+# Tabla de 256 cadenas hex de 2 dígitos: formatea bytes por indexado, sin f-strings
+HEX    = np.array([f"{i:02x}" for i in range(256)], dtype="<U2")
+HEX_NL = np.char.add(HEX, "\n")  # Último byte: incluye el fin de línea
+
+def write_mem(path, values, width=24, binary=False):
+    """
+    Escribe `values` como .mem (hex de width/4 dígitos, uno por línea) o, con
+    binary=True, como binario crudo little-endian (uint8 si width <= 8, si no uint32).
+    """
+    values = np.asarray(values, dtype=np.uint32).ravel()
+    if binary:
+        values.astype("u1" if width <= 8 else "<u4").tofile(path)
+        return
+
+    lines = HEX_NL[values & 0xff]
+    for k in range(1, (width + 7) // 8):
+        lines = np.char.add(HEX[(values >> (8 * k)) & 0xff], lines)
+
+    with open(path, "w") as f:
+        f.write("".join(lines.tolist()))
+
+def convert_logo_to_mem(input_path, output_path, bg_color=(0, 0, 0), binary=False, palette=False):
     img = Image.open(input_path).convert("RGB")
     w, h = img.size
 
-    with open(output_path, "w") as f:
-        for y in range(h):
-            for x in range(w):
-                r, g, b = img.getpixel((x, y))
-                if (r, g, b) == bg_color:
-                    val = 0x000000  # transparente (negro)
-                else:
-                    val = (r << 16) | (g << 8) | b
-                f.write(f"{val:06x}\n")
+    # Vista (h, w, 3) directa sobre el buffer crudo de PIL: sin getpixel por píxel
+    arr = np.frombuffer(img.tobytes("raw", "RGB"), dtype=np.uint8).reshape(h, w, 3)
+
+    # Fondo -> transparente (negro): una comparación entera por píxel
+    rgb       = arr.astype(np.uint32)
+    packed    = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    bg_packed = (bg_color[0] << 16) | (bg_color[1] << 8) | bg_color[2]
+    bg_mask   = packed == bg_packed
+    packed    = np.where(bg_mask, 0x000000, packed)
+
+    # Paleta: <nombre>.pal (colores) + <nombre>.idx (un índice de 8 bits por píxel).
+    # El índice 0 queda reservado para el fondo transparente; los colores reales
+    # (negro incluido) van de 1 en adelante.
+    if palette:
+        colors = np.concatenate(([0x000000], np.unique(packed[~bg_mask])))
+        idx    = np.where(bg_mask, 0, np.searchsorted(colors[1:], packed) + 1)
+        if len(colors) > 256:
+            raise ValueError(f"{input_path}: {len(colors)} colores, la paleta admite 256 como máximo")
+        stem, ext = os.path.splitext(output_path)
+        write_mem(f"{stem}.pal{ext}", colors, binary=binary)
+        write_mem(f"{stem}.idx{ext}", idx, width=8, binary=binary)
+        print(f"[✓] Logo convertido a: {stem}.pal{ext} + {stem}.idx{ext} ({w}x{h}, {len(colors)} colores)")
+        return
 
-    print(f"[✓] Logo convertido a: {output_path} ({w}x{h})")
+    # Binario: uint32 little-endian crudo, sin ida y vuelta por texto hex
+    write_mem(output_path, packed, binary=binary)
+    print(f"[✓] Logo convertido a: {output_path} ({w}x{h}{', binario' if binary else ''})")
 
 # Uso manual:
-convert_logo_to_mem("rect1.png", "logo.mem", bg_color=(0, 0, 0))
+if __name__ == "__main__":
+    convert_logo_to_mem("rect1.png", "logo.mem", bg_color=(0, 0, 0))
+    convert_logo_to_mem("rect1.png", "logo.bin", bg_color=(0, 0, 0), binary=True, palette=True)
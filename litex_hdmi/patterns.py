@@ -1,73 +1,251 @@
 from migen import *
-from migen.genlib.cdc import MultiReg
 from litex.gen import LiteXModule, log2_int
 from litex.soc.interconnect import stream
 from litex.soc.cores.video import video_timing_layout, video_data_layout
-from litex.soc.interconnect.csr import CSRStorage, AutoCSR
-import random
-from math import log2
+from litex.soc.interconnect.csr import CSRStorage, CSRField, AutoCSR
+import numpy as np
+from functools import lru_cache
 from math import isqrt
 
-# Seed once for reproducibility
-random.seed(0)
+HEX_CHARS = b"0123456789abcdefABCDEF \t\r\n"
+
+def _is_binary(path):
+    """.bin -> binario, .mem -> texto hex; con otra extensión se mira el contenido."""
+    if path.endswith(".bin"):
+        return True
+    if path.endswith(".mem"):
+        return False
+    with open(path, "rb") as f:
+        head = f.read(8)
+    return not all(c in HEX_CHARS for c in head)
+
+def _parse_readmemh(path, lines, width):
+    """
+    Parseo palabra a palabra para .mem que no tienen ancho fijo: acepta valores
+    sin ceros a la izquierda, comentarios // y saltos @addr como $readmemh.
+    """
+    words = []
+    pos   = 0  # dirección de escritura; @addr la mueve sin borrar lo ya cargado
+    for n, line in enumerate(lines, 1):
+        for tok in line.split("//")[0].split():
+            try:
+                if tok.startswith("@"):
+                    pos = int(tok[1:], 16)
+                    continue
+                value = int(tok, 16)
+            except ValueError:
+                raise ValueError(f"{path}:{n}: valor hex no válido {tok!r}") from None
+            if value >> width:
+                raise ValueError(f"{path}:{n}: {tok!r} no cabe en {width} bits")
+            if pos >= len(words):
+                words.extend([0] * (pos + 1 - len(words)))
+            words[pos] = value
+            pos += 1
+    return tuple(words)
+
+@lru_cache(maxsize=None)
+def load_mem(path, width=24):
+    """
+    Lee un archivo .mem (un valor hex de width/4 dígitos por línea) de una sola vez,
+    o uno binario (uint8 si width <= 8, si no uint32 little-endian) con np.fromfile.
+    Si alguna línea no tiene exactamente esos dígitos se parsea línea a línea.
+    Se memoriza por ruta para no volver a parsearlo en cada elaboración.
+    """
+    if _is_binary(path):
+        return tuple(np.fromfile(path, dtype="u1" if width <= 8 else "<u4").tolist())
+    nbytes = (width + 7) // 8
+    with open(path) as f:
+        lines = f.read().splitlines()
+    if any(len(l.strip()) not in (0, 2 * nbytes) for l in lines):
+        return _parse_readmemh(path, lines, width)
+    try:
+        raw = bytes.fromhex("".join(lines))
+    except ValueError:
+        return _parse_readmemh(path, lines, width)  # señala la línea culpable
+    data  = np.frombuffer(raw, dtype=np.uint8).reshape(-1, nbytes).astype(np.uint32)
+    words = np.zeros(len(data), dtype=np.uint32)
+    for k in range(data.shape[1]):
+        words = (words << 8) | data[:, k]
+    return tuple(words.tolist())
 
 class WishboneReader(LiteXModule):
-    def __init__(self, bus, addr_width=32, data_width=32):
-        self.addr  = Signal(addr_width)
-        self.start = Signal()
-        self.data  = Signal(data_width)
-        self.ready = Signal()
+    """
+    Lee ráfagas de `burst_len` palabras consecutivas del bus a partir de `addr`
+    (en bytes, alineada a la palabra). cyc se mantiene durante toda la ráfaga
+    (cti = ráfaga incremental, fin de ráfaga en la última) y cada palabra sale
+    por `source`, con last en la última. `ready` indica que admite otro start.
+    """
+    def __init__(self, bus, addr_width=32, data_width=32, burst_width=8, fifo_depth=4):
+        self.addr      = Signal(addr_width)
+        self.burst_len = Signal(burst_width, reset=1)
+        self.start     = Signal()
+        self.ready     = Signal()
+        self.source    = stream.Endpoint([("data", data_width)])
 
         self.bus = bus
 
         # Internos
-        data_reg  = Signal(data_width)
-        ready_reg = Signal(reset=1)
+        adr     = Signal(addr_width - 2)
+        count   = Signal(burst_width)
+        last    = Signal()
+        pending = Signal()  # stb emitido sin ack: se mantiene hasta el ack
+
+        # FIFO de salida: sólo se lanza una lectura si su palabra cabe, así el
+        # consumidor puede frenar con source.ready sin perder datos del bus
+        self.fifo = fifo = stream.SyncFIFO([("data", data_width)], fifo_depth)
+        self.comb += [
+            fifo.source.connect(self.source),
+            last.eq(count == 1),
+        ]
 
         self.fsm = fsm = FSM(reset_state="IDLE")
-        self.submodules += fsm
 
         fsm.act("IDLE",
-            self.bus.stb.eq(0),
-            self.bus.cyc.eq(0),
-            If(self.start,
+            self.ready.eq(1),
+            If(self.start & (self.burst_len != 0),
+                NextValue(adr, self.addr[2:]),
+                NextValue(count, self.burst_len),
                 NextState("READ")
             )
         )
 
         fsm.act("READ",
-            self.bus.stb.eq(1),
             self.bus.cyc.eq(1),
-            self.bus.adr.eq(self.addr >> 2),
-            self.bus.sel.eq(0xf),
+            self.bus.stb.eq(fifo.sink.ready | pending),
+            self.bus.adr.eq(adr),
+            self.bus.sel.eq(2**(data_width//8) - 1),
             self.bus.we.eq(0),
-            If(self.bus.ack,
-                NextValue(data_reg, self.bus.dat_r),
-                NextValue(ready_reg, 1),
-                NextState("IDLE")
+            self.bus.cti.eq(Mux(last, 0b111, 0b010)),
+            self.bus.bte.eq(0b00),
+            fifo.sink.valid.eq(self.bus.stb & self.bus.ack),
+            fifo.sink.data.eq(self.bus.dat_r),
+            fifo.sink.last.eq(last),
+            If(self.bus.stb & self.bus.ack,
+                NextValue(adr, adr + 1),
+                NextValue(count, count - 1),
+                If(last,
+                    NextState("IDLE")
+                )
             )
         )
 
-        self.sync += If(fsm.ongoing("READ") & ~self.bus.ack,
-            ready_reg.eq(0)
-        )
+        self.sync += pending.eq(fsm.ongoing("READ") & self.bus.stb & ~self.bus.ack)
 
-        self.comb += [
-            self.data.eq(data_reg),
-            self.ready.eq(ready_reg)
-        ]
+
+def solid_tiles(colors, tile_w=16, tile_h=16):
+    """Tileset de tiles de color sólido: tile_w*tile_h píxeles por cada color de `colors`."""
+    return np.repeat(np.asarray(colors, dtype=np.uint32), tile_w * tile_h).tolist()
+
+
+def delay_timing(module, sink, source, latency, clock_domain="hdmi", ce=None):
+    """
+    Retrasa de/hsync/vsync de sink `latency` muestras y devuelve Cat(de, hsync, vsync)
+    retrasado, alineado con los datos de un pipeline de esa latencia. Como en
+    VideoTerminal, cada etapa avanza con ce = sink.valid & source.ready: si source
+    frena, el VTG mantiene su muestra y el pipeline la mantiene también. Quien
+    no conecte sink.ready a source.ready pasa su propio `ce`.
+    """
+    sync   = getattr(module.sync, clock_domain)
+    timing = Cat(sink.de, sink.hsync, sink.vsync)
+    if ce is None:
+        ce = Signal()
+        module.comb += ce.eq(sink.valid & source.ready)
+    for _ in range(latency):
+        timing_d = Signal(len(timing))
+        sync += If(ce, timing_d.eq(timing))
+        timing = timing_d
+    return timing
+
+
+def connect_timing(module, sink, source, latency, clock_domain="hdmi"):
+    """
+    Conecta el handshake de sink a source y retrasa de/hsync/vsync `latency`
+    muestras (ver delay_timing).
+    """
+    module.comb += [
+        sink.connect(source, keep={"valid", "ready", "last"}),
+        Cat(source.de, source.hsync, source.vsync).eq(delay_timing(module, sink, source, latency, clock_domain)),
+    ]
+
+
+def connect_tile_rom(module, sink, source, tile_rom_data, tile_idx,
+                     tile_w=16, tile_h=16, latency=0, clock_domain="sys"):
+    """
+    ROM de tiles de 24 bits (0xRRGGBB) común a los renderers de franjas: lee el
+    píxel (hcount, vcount) del tile `tile_idx` y lo presenta en source.
+    La dirección se registra y la lectura es síncrona (2 ciclos, avanzan con
+    sink.valid & source.ready); de/hsync/vsync se alinean con connect_timing.
+    `latency` son los ciclos que el llamador ya gastó en calcular tile_idx: las
+    coordenadas dentro del tile y la temporización se retrasan lo mismo.
+    """
+    sync = getattr(module.sync, clock_domain)
+    ce   = Signal()
+    module.comb += ce.eq(sink.valid & source.ready)
+
+    depth = len(tile_rom_data)
+    rom   = Memory(width=24, depth=depth, init=list(tile_rom_data))
+    port  = rom.get_port(has_re=True, clock_domain=clock_domain)
+    module.specials += rom, port
+
+    # Coordenadas dentro del tile (tiles potencia de 2, log2_int lo comprueba),
+    # alineadas con tile_idx
+    x = sink.hcount[:log2_int(tile_w)]
+    y = sink.vcount[:log2_int(tile_h)]
+    for _ in range(latency):
+        x_d = Signal(len(x))
+        y_d = Signal(len(y))
+        sync += If(ce, x_d.eq(x), y_d.eq(y))
+        x, y = x_d, y_d
+
+    # Dirección: bloque + offset dentro del bloque, concatenando bits. Registrada
+    # para cortar el camino tile_idx -> dirección de la BRAM.
+    addr = Signal(max=depth)
+    sync += If(ce,
+        addr.eq(Cat(x, y, tile_idx))
+    )
+
+    module.comb += [
+        port.adr.eq(addr),
+        port.re.eq(ce),
+        source.r.eq(port.dat_r[16:24]),
+        source.g.eq(port.dat_r[8:16]),
+        source.b.eq(port.dat_r[0:8]),
+    ]
+    connect_timing(module, sink, source, latency=latency + 2, clock_domain=clock_domain)
+
+
+def compose_tilemap(tile_rom_data, tilemap_data, tiles_x, tiles_y, tile_w=16, tile_h=16):
+    """
+    Compone en tiempo de build el tilemap completo a partir del tileset:
+    devuelve un píxel RGB por posición de pantalla, en orden raster.
+    """
+    tiles   = np.asarray(tile_rom_data, dtype=np.uint32).reshape(-1, tile_h, tile_w)
+    tilemap = np.asarray(tilemap_data).reshape(tiles_y, tiles_x)
+    # (tiles_y, tiles_x, tile_h, tile_w) -> (tiles_y, tile_h, tiles_x, tile_w) = raster
+    return tiles[tilemap].transpose(0, 2, 1, 3).reshape(-1).tolist()
 
 
 class TilemapRenderer(LiteXModule):
+    """
+    Dibuja un tilemap estático de tiles de tile_w×tile_h.
+    Con prerender=True el tilemap se compone una sola vez en build y se guarda
+    como framebuffer ROM de screen_w×screen_h (una sola lectura por píxel); sólo
+    cabe en BRAM para resoluciones pequeñas.
+    """
     def __init__(self, tile_rom_data,
                  screen_w=640, screen_h=480,
                  tile_w=16, tile_h=16,
-                 tilemap_data=None):
+                 tilemap_data=None,
+                 prerender=False):
 
         # Endpoints
         self.vtg_sink = stream.Endpoint(video_timing_layout)
         self.source   = stream.Endpoint(video_data_layout)
 
+        # Habilitación del pipeline: avanza sólo con cada muestra aceptada
+        ce = Signal()
+        self.comb += ce.eq(self.vtg_sink.valid & self.source.ready)
+
         # Dimensions
         tiles_x = screen_w // tile_w
         tiles_y = screen_h // tile_h
@@ -78,9 +256,33 @@ class TilemapRenderer(LiteXModule):
         pixels_per_tile = tile_w * tile_h
         num_tiles = total_pixels // pixels_per_tile
 
-        # Default/random tilemap
+        # Default/random tilemap (semilla fija: el mismo mapa en cada build)
         if tilemap_data is None or len(tilemap_data) != num_cells:
-            tilemap_data = [random.randrange(num_tiles) for _ in range(num_cells)]
+            tilemap_data = np.random.default_rng(0).integers(0, num_tiles, size=num_cells).tolist()
+
+        # Prerendered framebuffer ROM
+        if prerender:
+            fb_data = compose_tilemap(tile_rom_data, tilemap_data, tiles_x, tiles_y, tile_w, tile_h)
+            self.fb_rom  = Memory(width=24, depth=screen_w * screen_h, init=fb_data)
+            self.fb_port = self.fb_rom.get_port(clock_domain="hdmi", has_re=True)
+            self.specials += self.fb_rom, self.fb_port
+
+            # Lectura síncrona + registro de salida: 2 ciclos de latencia
+            if screen_w & (screen_w - 1) == 0:
+                fb_addr = Cat(self.vtg_sink.hcount[:log2_int(screen_w)], self.vtg_sink.vcount)
+            else:
+                fb_addr = self.vtg_sink.vcount * screen_w + self.vtg_sink.hcount
+            self.comb += [
+                self.fb_port.adr.eq(fb_addr),
+                self.fb_port.re.eq(ce),
+            ]
+            self.sync.hdmi += If(ce,
+                self.source.r.eq(self.fb_port.dat_r[16:24]),
+                self.source.g.eq(self.fb_port.dat_r[8:16]),
+                self.source.b.eq(self.fb_port.dat_r[0:8]),
+            )
+            connect_timing(self, self.vtg_sink, self.source, latency=2)
+            return
 
         # Calculate bits for tile index
         max_index = num_tiles - 1 if num_tiles > 1 else 1
@@ -91,55 +293,77 @@ class TilemapRenderer(LiteXModule):
         self.tilemap_port = self.tilemap_rom.get_port(clock_domain="hdmi", has_re=True)
         self.specials += self.tilemap_rom, self.tilemap_port
 
-        # Tile ROM split RGB
-        depth = total_pixels
-        init_r = [(v >> 16) & 0xFF for v in tile_rom_data]
-        init_g = [(v >>  8) & 0xFF for v in tile_rom_data]
-        init_b = [ v        & 0xFF for v in tile_rom_data]
-        rom_r = Memory(width=8, depth=depth, init=init_r)
-        rom_g = Memory(width=8, depth=depth, init=init_g)
-        rom_b = Memory(width=8, depth=depth, init=init_b)
-        port_r = rom_r.get_port(clock_domain="hdmi")
-        port_g = rom_g.get_port(clock_domain="hdmi")
-        port_b = rom_b.get_port(clock_domain="hdmi")
-        self.specials += rom_r, rom_g, rom_b, port_r, port_g, port_b
+        # Tile ROM: una palabra ancha por fila de tile (tile_w píxeles de 24 bits).
+        # Cada píxel aporta sus 3 bytes bajos little-endian; la fila completa se
+        # convierte a entero de una vez (píxel i en los bits 24*i..24*i+23).
+        depth    = total_pixels // tile_w
+        row_size = 3 * tile_w
+        rows     = np.asarray(tile_rom_data, dtype="<u4")[:depth * tile_w].view(np.uint8)
+        raw      = rows.reshape(-1, 4)[:, :3].tobytes()
+        row_data = [int.from_bytes(raw[r:r + row_size], "little") for r in range(0, len(raw), row_size)]
+        self.tile_rom      = Memory(width=24 * tile_w, depth=depth, init=row_data)
+        self.tile_rom_port = self.tile_rom.get_port(clock_domain="hdmi", has_re=True)
+        self.specials += self.tile_rom, self.tile_rom_port
 
         # Signals
         tile_x       = Signal(max=tiles_x)
         tile_y       = Signal(max=tiles_y)
         pixel_x      = Signal(max=tile_w)
         pixel_y      = Signal(max=tile_h)
+        pixel_x_d1   = Signal(max=tile_w)
+        pixel_x_d2   = Signal(max=tile_w)
+        pixel_y_d1   = Signal(max=tile_h)
         tilemap_addr = Signal(max=num_cells)
         tile_id      = Signal(idx_bits)
-        tile_id_next = Signal(idx_bits)
         tile_addr    = Signal(max=depth)
+        pixel        = Signal(24)
 
-        shift_w = int(log2(tile_w))
-        shift_h = int(log2(tile_h))
+        # Dimensiones potencia de 2 (log2_int lo comprueba): la dirección se arma concatenando bits
+        shift_w = log2_int(tile_w)
+        shift_h = log2_int(tile_h)
         mask_w  = tile_w - 1
         mask_h  = tile_h - 1
 
-        # Combinatorial logic
+        # Con tiles_x potencia de 2 la fila del tilemap se concatena, sin multiplicador
+        if tiles_x & (tiles_x - 1) == 0:
+            self.comb += tilemap_addr.eq(Cat(tile_x, tile_y))
+        else:
+            self.comb += tilemap_addr.eq(tile_y * tiles_x + tile_x)
+
+        # Pipeline (3 ciclos, avanza con ce):
+        #   0: hcount/vcount -> dirección del tilemap
+        #   1: tile_id       -> dirección de la fila del tile
+        #   2: fila del tile -> píxel, registrado en la salida
         self.comb += [
+            self.tilemap_port.re.eq(ce),
+            self.tile_rom_port.re.eq(ce),
+
             tile_x.eq(self.vtg_sink.hcount >> shift_w),
             tile_y.eq(self.vtg_sink.vcount >> shift_h),
             pixel_x.eq(self.vtg_sink.hcount & mask_w),
             pixel_y.eq(self.vtg_sink.vcount & mask_h),
 
-            tilemap_addr.eq(tile_y * tiles_x + tile_x),
-            tile_addr.eq(tile_id * pixels_per_tile + pixel_y * tile_w + pixel_x),
-
             self.tilemap_port.adr.eq(tilemap_addr),
-            port_r.adr.eq(tile_addr), port_g.adr.eq(tile_addr), port_b.adr.eq(tile_addr),
 
-            self.vtg_sink.connect(self.source, keep={"valid","ready","last","de","hsync","vsync"}),
-            self.source.r.eq(port_r.dat_r),
-            self.source.g.eq(port_g.dat_r),
-            self.source.b.eq(port_b.dat_r),
+            tile_id.eq(self.tilemap_port.dat_r),
+            tile_addr.eq(Cat(pixel_y_d1, tile_id)),
+            self.tile_rom_port.adr.eq(tile_addr),
+
+            # Selección del píxel dentro de la fila leída
+            pixel.eq(self.tile_rom_port.dat_r.part(pixel_x_d2 * 24, 24)),
         ]
 
-        # Register tile_id with 1-cycle delay
-        self.sync.hdmi += [ tile_id_next.eq(self.tilemap_port.dat_r), tile_id.eq(tile_id_next) ]
+        # Las coordenadas dentro del tile acompañan a las lecturas síncronas
+        self.sync.hdmi += If(ce,
+            pixel_x_d1.eq(pixel_x),
+            pixel_x_d2.eq(pixel_x_d1),
+            pixel_y_d1.eq(pixel_y),
+
+            self.source.r.eq(pixel[16:24]),
+            self.source.g.eq(pixel[8:16]),
+            self.source.b.eq(pixel[0:8]),
+        )
+        connect_timing(self, self.vtg_sink, self.source, latency=3)
 
 class BarsRenderer(LiteXModule):
     """
@@ -161,94 +385,57 @@ class BarsRenderer(LiteXModule):
         stripes_count   = total_tiles                          # uno por cada tile
         stripe_width    = max(1, screen_w // stripes_count)    # ancho de cada franja
 
-        # Carga ROM RGB completa
-        depth = total_pixels
-        init_r = [(c >> 16) & 0xFF for c in tile_rom_data]
-        init_g = [(c >>  8) & 0xFF for c in tile_rom_data]
-        init_b = [ c        & 0xFF for c in tile_rom_data]
-        rom_r = Memory(width=8, depth=depth, init=init_r)
-        rom_g = Memory(width=8, depth=depth, init=init_g)
-        rom_b = Memory(width=8, depth=depth, init=init_b)
-        port_r = rom_r.get_port(has_re=False)
-        port_g = rom_g.get_port(has_re=False)
-        port_b = rom_b.get_port(has_re=False)
-        self.specials += rom_r, rom_g, rom_b, port_r, port_g, port_b
-
-        # Señales de coordenadas
         h = self.vtg_sink.hcount
-        v = self.vtg_sink.vcount
-        mask_w = tile_w - 1
-        mask_h = tile_h - 1
 
-        # Índice de franja (0..stripes_count-1) usando Mux encadenado
+        # Índice de franja (0..stripes_count-1): h // stripe_width, saturado a la última
         bar_idx = Signal(max=stripes_count)
-        expr = 0
-        # iterar de 1 a stripes_count-1
-        for i in range(1, stripes_count):
-            expr = Mux(h >= i * stripe_width, i, expr)
-        self.comb += bar_idx.eq(expr)
-
-        # Dirección en ROM: bloque + offset dentro del bloque
-        addr = Signal(max=depth)
-        self.comb += addr.eq(
-            bar_idx * pixels_per_tile +
-            (v & mask_h) * tile_w +
-            (h & mask_w)
-        )
-
-        # Conexión a puertos y salida de video
-        self.comb += [
-            port_r.adr.eq(addr),
-            port_g.adr.eq(addr),
-            port_b.adr.eq(addr),
-            self.vtg_sink.connect(self.source,
-                keep={"valid","ready","last","de","hsync","vsync"}),
-            self.source.r.eq(port_r.dat_r),
-            self.source.g.eq(port_g.dat_r),
-            self.source.b.eq(port_b.dat_r),
-        ]
-
-
-class MovingSpritePatternFromFile(LiteXModule):
-    def __init__(self, hres=640, vres=480):
-        self.enable   = Signal(reset=1)
-        self.vtg_sink = stream.Endpoint(video_timing_layout)
-        self.source   = stream.Endpoint(video_data_layout)
-
-        enable = Signal()
-        self.specials += MultiReg(self.enable, enable)
-
-        SPRITE_W = 64
-        SPRITE_H = 64
-
-        # Sprite ROM: file
-        with open("logo.mem") as f:
-            sprite_data = [int(line.strip(), 16) for line in f if line.strip()]
-
-        sprite_mem = Memory(24, SPRITE_W * SPRITE_H, init=sprite_data)  # Ajusta tamaño real
-        sprite_port = sprite_mem.get_port(has_re=False)
-        self.specials += sprite_mem, sprite_port
-
+        if stripe_width & (stripe_width - 1) == 0:
+            # Ancho potencia de 2: basta un desplazamiento
+            bar_div = Signal(len(h))
+            self.comb += [
+                bar_div.eq(h >> log2_int(stripe_width)),
+                bar_idx.eq(Mux(bar_div >= stripes_count - 1, stripes_count - 1, bar_div)),
+            ]
+        else:
+            # Si no, tabla precalculada indexada por h (lectura asíncrona: LUTs, sin
+            # latencia). Cubre 2**lut_bits columnas para que el blanking no se salga.
+            lut_bits = bits_for(screen_w - 1)
+            bar_lut  = Memory(width=len(bar_idx), depth=2**lut_bits,
+                init=[min(i // stripe_width, stripes_count - 1) for i in range(2**lut_bits)])
+            bar_port = bar_lut.get_port(async_read=True)
+            self.specials += bar_lut, bar_port
+            self.comb += [
+                bar_port.adr.eq(h[:lut_bits]),
+                bar_idx.eq(bar_port.dat_r),
+            ]
+
+        # ROM del tileset y salida de video
+        connect_tile_rom(self, self.vtg_sink, self.source, tile_rom_data, bar_idx, tile_w, tile_h)
+
+
+class SpriteBounce(LiteXModule):
+    """
+    Mueve un sprite de sprite_w×sprite_h un píxel por frame (en cada flanco
+    de subida de vsync), rebotando en los bordes de una pantalla hres×vres.
+    """
+    def __init__(self, hres, vres, sprite_w, sprite_h, vsync):
         # Sprite posición y dirección
-        sprite_x = Signal(max=hres)
-        sprite_y = Signal(max=vres)
+        self.x = sprite_x = Signal(max=hres)
+        self.y = sprite_y = Signal(max=vres)
         dir_x = Signal(reset=1)  # 1: derecha, 0: izquierda
         dir_y = Signal(reset=1)  # 1: abajo,   0: arriba
 
         # Detectar flanco de vsync
         vsync_prev = Signal()
         vsync_rise = Signal()
-        vsync_sig = Signal()
-        self.comb += vsync_sig.eq(self.vtg_sink.vsync)  # si estás propagando vsync del VTG a tu patrón
-
-        self.sync += vsync_prev.eq(vsync_sig)
-        self.comb += vsync_rise.eq(vsync_sig & ~vsync_prev)
+        self.sync += vsync_prev.eq(vsync)
+        self.comb += vsync_rise.eq(vsync & ~vsync_prev)
 
         # Movimiento del sprite sincronizado con vsync
         self.sync += If(vsync_rise,
             # Horizontal
             If(dir_x,
-                If(sprite_x + SPRITE_W >= hres - 1,
+                If(sprite_x + sprite_w >= hres - 1,
                     dir_x.eq(0)
                 ).Else(
                     sprite_x.eq(sprite_x + 1)
@@ -262,7 +449,7 @@ class MovingSpritePatternFromFile(LiteXModule):
             ),
             # Vertical
             If(dir_y,
-                If(sprite_y + SPRITE_H >= vres - 1,
+                If(sprite_y + sprite_h >= vres - 1,
                     dir_y.eq(0)
                 ).Else(
                     sprite_y.eq(sprite_y + 1)
@@ -276,30 +463,107 @@ class MovingSpritePatternFromFile(LiteXModule):
             )
         )
 
+
+class MovingSpritePatternFromFile(LiteXModule):
+    def __init__(self, hres=640, vres=480, stem="logo", ext=".bin"):
+        self.enable   = Signal(reset=1)
+        self.vtg_sink = stream.Endpoint(video_timing_layout)
+        self.source   = stream.Endpoint(video_data_layout)
+
+        # Habilitación del pipeline: avanza con cada muestra aceptada del VTG,
+        # también en IDLE, donde vtg_sink.ready no depende de source.ready.
+        ce = Signal()
+        self.comb += ce.eq(self.vtg_sink.valid & self.vtg_sink.ready)
+
+        SPRITE_W = 64
+        SPRITE_H = 64
+        assert SPRITE_W & (SPRITE_W - 1) == 0 and SPRITE_H & (SPRITE_H - 1) == 0
+
+        # Sprite ROM indexada: un índice de paleta por píxel + LUT de colores,
+        # <stem>.idx<ext> / <stem>.pal<ext> tal como los genera convert_logo_to_mem(palette=True).
+        # El índice 0 es el fondo: se marca transparente con el bit 24 de la paleta.
+        sprite_idx = load_mem(f"{stem}.idx{ext}", width=8)
+        palette    = load_mem(f"{stem}.pal{ext}")
+        palette    = (palette[0] | (1 << 24),) + palette[1:]
+        idx_bits   = max(1, (len(palette) - 1).bit_length())
+        if len(sprite_idx) != SPRITE_W * SPRITE_H:
+            raise ValueError(f"{stem}.idx{ext}: {len(sprite_idx)} píxeles, se esperaban {SPRITE_W}x{SPRITE_H}")
+
+        sprite_mem = Memory(idx_bits, SPRITE_W * SPRITE_H, init=sprite_idx)
+        sprite_port = sprite_mem.get_port(has_re=True)
+        self.specials += sprite_mem, sprite_port
+
+        palette_mem  = Memory(25, len(palette), init=palette)
+        palette_port = palette_mem.get_port(has_re=True)
+        self.specials += palette_mem, palette_port
+
+        # Movimiento del sprite (detecta el flanco de vsync del VTG)
+        self.bounce = SpriteBounce(hres, vres, SPRITE_W, SPRITE_H, self.vtg_sink.vsync)
+        sprite_x = self.bounce.x
+        sprite_y = self.bounce.y
+
         # Lógica de visibilidad y direccionamiento del sprite
-        sprite_visible = Signal()
+        sprite_visible   = Signal()
+        sprite_visible_d = Signal()  # Alineado con la lectura del índice
+        sprite_visible_p = Signal()  # Alineado con la lectura de la paleta
         sprite_x_off   = Signal(max=SPRITE_W)
         sprite_y_off   = Signal(max=SPRITE_H)
         sprite_addr    = Signal(max=SPRITE_W * SPRITE_H)
 
-        self.comb += sprite_visible.eq(
-            (self.vtg_sink.hcount >= sprite_x) & (self.vtg_sink.hcount < sprite_x + SPRITE_W) &
-            (self.vtg_sink.vcount >= sprite_y) & (self.vtg_sink.vcount < sprite_y + SPRITE_H)
+        x_in_sprite    = Signal()
+        y_in_sprite    = Signal()
+
+        # Contadores de rango: arrancan al igualar el borde izquierdo/superior
+        # y cuentan SPRITE_W píxeles / SPRITE_H líneas (sin restas ni comparadores)
+        self.sync += If(ce,
+            If(self.vtg_sink.hcount == sprite_x,
+                x_in_sprite.eq(1),
+                sprite_x_off.eq(0)
+            ).Elif(x_in_sprite,
+                sprite_x_off.eq(sprite_x_off + 1),
+                If(sprite_x_off == SPRITE_W - 1,
+                    x_in_sprite.eq(0)
+                )
+            ),
+            If(self.vtg_sink.hcount == 0,
+                If(self.vtg_sink.vcount == sprite_y,
+                    y_in_sprite.eq(1),
+                    sprite_y_off.eq(0)
+                ).Elif(y_in_sprite,
+                    sprite_y_off.eq(sprite_y_off + 1),
+                    If(sprite_y_off == SPRITE_H - 1,
+                        y_in_sprite.eq(0)
+                    )
+                )
+            )
         )
 
         self.comb += [
-            sprite_x_off.eq(Mux(sprite_visible, self.vtg_sink.hcount - sprite_x, 0)),
-            sprite_y_off.eq(Mux(sprite_visible, self.vtg_sink.vcount - sprite_y, 0)),
-            sprite_addr.eq(sprite_y_off * SPRITE_W + sprite_x_off),
+            sprite_visible.eq(x_in_sprite & y_in_sprite),
+            sprite_addr.eq(Cat(sprite_x_off, sprite_y_off)),
             sprite_port.adr.eq(sprite_addr)
         ]
+        # La lectura de la paleta y los retardos de visibilidad avanzan con ce,
+        # como los contadores, para que un hueco en el stream no los desalinee
+        self.comb += [
+            palette_port.adr.eq(sprite_port.dat_r),
+            palette_port.re.eq(ce),
+        ]
+        self.sync += If(ce,
+            sprite_visible_d.eq(sprite_visible),
+            sprite_visible_p.eq(sprite_visible_d),
+        )
 
+        # de/hsync/vsync retrasados 3 muestras para ir con el píxel: contadores de
+        # rango registrados + lectura del índice + lectura de la paleta
+        self.comb += Cat(self.source.de, self.source.hsync, self.source.vsync).eq(
+            delay_timing(self, self.vtg_sink, self.source, latency=3, clock_domain="sys", ce=ce))
 
         # FSM para salida de video
         fsm = FSM(reset_state="IDLE")
         fsm = ResetInserter()(fsm)
         self.fsm = fsm
-        self.comb += fsm.reset.eq(~self.enable)
+        self.comb += fsm.reset.eq(~self.enable)  # enable vive en el mismo dominio que la FSM
 
         fsm.act("IDLE",
             self.vtg_sink.ready.eq(1),
@@ -310,11 +574,13 @@ class MovingSpritePatternFromFile(LiteXModule):
         )
 
         fsm.act("RUN",
-            self.vtg_sink.connect(self.source, keep={"valid", "ready", "last", "de", "hsync", "vsync"}),
-            If(sprite_visible,
-                self.source.r.eq(sprite_port.dat_r[16:24]),
-                self.source.g.eq(sprite_port.dat_r[8:16]),
-                self.source.b.eq(sprite_port.dat_r[0:8])
+            self.vtg_sink.connect(self.source, keep={"valid", "ready", "last"}),
+            # Sólo se lee la ROM dentro del rectángulo del sprite
+            sprite_port.re.eq(sprite_visible & ce),
+            If(sprite_visible_p & ~palette_port.dat_r[24],
+                self.source.r.eq(palette_port.dat_r[16:24]),
+                self.source.g.eq(palette_port.dat_r[8:16]),
+                self.source.b.eq(palette_port.dat_r[0:8])
             ).Else(
                 self.source.r.eq(0),
                 self.source.g.eq(0),
@@ -326,7 +592,8 @@ class BarsC(LiteXModule, AutoCSR):
     """
     Dibuja N franjas verticales (una por cada tile de 16×16) en pantalla,
     usando todo el tileset de tu ROM. La posición de cada barra se controla
-    desde la CPU vía CSRs start_0…start_N-1.
+    desde la CPU con un único CSR `starts`, con un campo start_0…start_N-1
+    de bits_for(screen_w) bits por franja.
     """
     def __init__(self, tile_rom_data,
                  screen_w=640, screen_h=480,
@@ -343,55 +610,48 @@ class BarsC(LiteXModule, AutoCSR):
         # Número de franjas = número de tiles
         stripes_count = total_tiles
 
-        # Crear CSRs individualmente para cada franja
-        for i in range(stripes_count):
-            csr = CSRStorage(size=32,
-                             reset=i * (screen_w // stripes_count),
-                             name=f"start_{i}")
-            setattr(self, f"start_{i}", csr)
-        # Memorias RGB de todo el tileset
-        depth = total_pixels
-        init_r = [(c >> 16) & 0xFF for c in tile_rom_data]
-        init_g = [(c >>  8) & 0xFF for c in tile_rom_data]
-        init_b = [ c        & 0xFF for c in tile_rom_data]
-        rom_r = Memory(width=8, depth=depth, init=init_r)
-        rom_g = Memory(width=8, depth=depth, init=init_g)
-        rom_b = Memory(width=8, depth=depth, init=init_b)
-        port_r = rom_r.get_port(has_re=False)
-        port_g = rom_g.get_port(has_re=False)
-        port_b = rom_b.get_port(has_re=False)
-        self.specials += rom_r, rom_g, rom_b, port_r, port_g, port_b
-
-        # Señales de coordenadas
+        # Un solo CSR con un campo por franja (escritura atómica: las franjas cambian juntas)
+        start_bits  = bits_for(screen_w)
+        self.starts = CSRStorage(name="starts", atomic_write=True, fields=[
+            CSRField(f"start_{i}", size=start_bits, reset=i * (screen_w // stripes_count),
+                     description=f"Columna donde empieza la franja {i}.")
+            for i in range(stripes_count)
+        ])
+        starts = [self.starts.storage[i * start_bits:(i + 1) * start_bits] for i in range(stripes_count)]
+
         h = self.vtg_sink.hcount
-        v = self.vtg_sink.vcount
-        mask_w = tile_w - 1
-        mask_h = tile_h - 1
 
-        # Mux encadenado: busca el último i tal que h >= start_x[i]
+        # Habilitación del pipeline: avanza sólo con cada muestra aceptada
+        ce = Signal()
+        self.comb += ce.eq(self.vtg_sink.valid & self.source.ready)
+
+        # Árbol balanceado de comparadores: busca el último i tal que h >= start_x[i].
+        # Cada nodo es (alguna franja del rango empezó, índice de la última que empezó).
+        # Cada nivel se registra (avanza con ce): ceil(log2(N)) ciclos.
+        nodes  = [(h >= start, i) for i, start in enumerate(starts)]
+        levels = 0
+        while len(nodes) > 1:
+            level = []
+            pairs = list(zip(nodes[0::2], nodes[1::2]))
+            if len(nodes) % 2:
+                pairs.append((nodes[-1], None))
+            for (hit_l, idx_l), right in pairs:
+                hit = Signal()
+                idx = Signal(max=stripes_count)
+                if right is None:
+                    self.sync += If(ce, hit.eq(hit_l), idx.eq(idx_l))
+                else:
+                    hit_r, idx_r = right
+                    self.sync += If(ce,
+                        hit.eq(hit_l | hit_r),
+                        idx.eq(Mux(hit_r, idx_r, idx_l))
+                    )
+                level.append((hit, idx))
+            nodes   = level
+            levels += 1
         bar_idx = Signal(max=stripes_count)
-        expr = 0
-        for i in range(stripes_count):
-            start_sig = getattr(self, f"start_{i}").storage
-            expr = Mux(h >= start_sig, i, expr)
-        self.comb += bar_idx.eq(expr)
-
-        # Dirección en ROM: bloque + offset dentro del bloque
-        addr = Signal(max=depth)
-        self.comb += addr.eq(
-            bar_idx * pixels_per_tile +
-            (v & mask_h) * tile_w +
-            (h & mask_w)
-        )
+        self.comb += bar_idx.eq(nodes[0][1])
 
-        # Conexión a video
-        self.comb += [
-            port_r.adr.eq(addr),
-            port_g.adr.eq(addr),
-            port_b.adr.eq(addr),
-            self.vtg_sink.connect(self.source,
-                keep={"valid","ready","last","de","hsync","vsync"}),
-            self.source.r.eq(port_r.dat_r),
-            self.source.g.eq(port_g.dat_r),
-            self.source.b.eq(port_b.dat_r),
-        ]
+        # ROM del tileset y salida de video, alineadas con el árbol
+        connect_tile_rom(self, self.vtg_sink, self.source, tile_rom_data, bar_idx, tile_w, tile_h,
+                         latency=levels)
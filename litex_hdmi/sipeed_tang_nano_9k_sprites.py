@@ -97,15 +97,14 @@ class BaseSoC(SoCCore):
             
             if with_video_terminal:
                 if hdmi_pattern == "c":
-                    from patterns import BarsC
+                    from patterns import BarsC, load_mem
                     # 1) Instancia el VTG y el PHY HDMI
                     self.submodules.vtg     = VideoTimingGenerator(default_video_timings="640x480@60Hz")
                     self.submodules.videophy= VideoGowinHDMIPHY(platform.request("hdmi"),
                                                                 clock_domain="hdmi")
 
                     # 2) Después, carga tu tiles.mem y crea el renderer
-                    with open("tiles.mem") as f:
-                        tile_rgb_data = [int(l.strip(), 16) for l in f if l.strip()]
+                    tile_rgb_data = load_mem("tiles.mem")
 
                     self.submodules.bars = ClockDomainsRenamer("hdmi")(
                         BarsC(
@@ -115,18 +114,14 @@ class BaseSoC(SoCCore):
                         )
                     )
 
-                    # 3) Ahora desplaza VSYNC y conecta toda la cadena
-                    vsync_shifted = Signal()
-                    self.sync.hdmi += vsync_shifted.eq(self.vtg.source.vsync)
-
+                    # 3) Conecta toda la cadena (el renderer ya alinea de/hsync/vsync con sus datos)
                     self.comb += [
-                        self.vtg.source.connect(self.bars.vtg_sink, omit={"vsync"}),
-                        self.bars.vtg_sink.vsync.eq(vsync_shifted),
+                        self.vtg.source.connect(self.bars.vtg_sink),
                         self.bars.source.connect(self.videophy.sink),
                     ]
 
                 elif hdmi_pattern == "bars":
-                    from patterns import BarsRenderer
+                    from patterns import BarsRenderer, solid_tiles
 
                     # 1) Instancia el VTG y el PHY HDMI
                     self.submodules.vtg = VideoTimingGenerator(default_video_timings="640x480@60Hz")
@@ -141,9 +136,7 @@ class BaseSoC(SoCCore):
                         0xFFFF00, 0xFF00FF, 0x00FFFF, 0xFFFFFF
                     ]
 
-                    tile_rom_data = []
-                    for color in base_colors:
-                        tile_rom_data += [color] * (16 * 16)  # 256 píxeles por tile
+                    tile_rom_data = solid_tiles(base_colors, 16, 16)  # 256 píxeles por tile
 
                     self.submodules.bars = ClockDomainsRenamer("hdmi")(
                         BarsRenderer(tile_rom_data, screen_w=640, screen_h=480, tile_w=16, tile_h=16)
@@ -171,7 +164,7 @@ class BaseSoC(SoCCore):
                         self.sprite_pattern.source.connect(self.videophy.sink)
                     ]
                 elif hdmi_pattern == "tilemap":
-                    from patterns import TilemapRenderer
+                    from patterns import TilemapRenderer, load_mem
 
                     # 1) Instancia el VTG y el PHY HDMI
                     self.submodules.vtg     = VideoTimingGenerator(default_video_timings="640x480@60Hz")
@@ -179,8 +172,7 @@ class BaseSoC(SoCCore):
                                                                 clock_domain="hdmi")
 
                     # 2) Después, carga tu tiles.mem y crea el renderer
-                    with open("tiles.mem") as f:
-                        tile_rgb_data = [int(l.strip(), 16) for l in f if l.strip()]
+                    tile_rgb_data = load_mem("tiles.mem")
 
                     self.submodules.bars = ClockDomainsRenamer("hdmi")(
                         TilemapRenderer(
@@ -190,13 +182,9 @@ class BaseSoC(SoCCore):
                         )
                     )
 
-                    # 3) Ahora desplaza VSYNC y conecta toda la cadena
-                    vsync_shifted = Signal()
-                    self.sync.hdmi += vsync_shifted.eq(self.vtg.source.vsync)
-
+                    # 3) Conecta toda la cadena (el renderer ya alinea de/hsync/vsync con sus datos)
                     self.comb += [
-                        self.vtg.source.connect(self.bars.vtg_sink, omit={"vsync"}),
-                        self.bars.vtg_sink.vsync.eq(vsync_shifted),
+                        self.vtg.source.connect(self.bars.vtg_sink),
                         self.bars.source.connect(self.videophy.sink),
                     ]
                 else:
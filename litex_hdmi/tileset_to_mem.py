@@ -1,7 +1,11 @@
+import os
+import numpy as np
 from PIL import Image
 import argparse
 
-def tileset_to_mem(input_path, tile_width=16, tile_height=16, output_path="tiles.mem"):
+from logo_creation import write_mem
+
+def tileset_to_mem(input_path, tile_width=16, tile_height=16, output_path="tiles.mem", binary=False):
     img = Image.open(input_path).convert("RGB")
     img_w, img_h = img.size
 
@@ -11,22 +15,28 @@ def tileset_to_mem(input_path, tile_width=16, tile_height=16, output_path="tiles
 
     print(f"[✓] Tiles: {tiles_x} x {tiles_y} = {total_tiles} tiles")
 
-    with open(output_path, "w") as f:
-        for ty in range(tiles_y):
-            for tx in range(tiles_x):
-                for y in range(tile_height):
-                    for x in range(tile_width):
-                        px = img.getpixel((tx*tile_width + x, ty*tile_height + y))
-                        rgb = (px[0] << 16) | (px[1] << 8) | px[2]
-                        f.write(f"{rgb:06x}\n")
+    # Imagen completa (h, w, 3) recortada a tiles enteros, empaquetada a 0xRRGGBB
+    arr    = np.asarray(img, dtype=np.uint32)[:tiles_y*tile_height, :tiles_x*tile_width]
+    packed = (arr[..., 0] << 16) | (arr[..., 1] << 8) | arr[..., 2]
+
+    # Orden tile a tile: (ty, y, tx, x) -> (ty, tx, y, x)
+    tiles = packed.reshape(tiles_y, tile_height, tiles_x, tile_width).transpose(0, 2, 1, 3)
+    write_mem(output_path, tiles)
     print(f"[✓] Generado: {output_path}")
 
+    # Copia binaria (uint32 little-endian) junto al .mem: se carga sin parsear hex
+    if binary:
+        bin_path = os.path.splitext(output_path)[0] + ".bin"
+        write_mem(bin_path, tiles, binary=True)
+        print(f"[✓] Generado: {bin_path}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Convierte tileset PNG a .mem")
     parser.add_argument("input", help="Archivo PNG del tileset")
     parser.add_argument("--tile_w", type=int, default=16, help="Ancho del tile")
     parser.add_argument("--tile_h", type=int, default=16, help="Alto del tile")
     parser.add_argument("--output", default="tiles.mem", help="Archivo de salida .mem")
+    parser.add_argument("--binary", action="store_true", help="Genera también un .bin (uint32 little-endian)")
     args = parser.parse_args()
 
-    tileset_to_mem(args.input, args.tile_w, args.tile_h, args.output)
+    tileset_to_mem(args.input, args.tile_w, args.tile_h, args.output, args.binary)
@@ -20,16 +20,18 @@ from misc.soc_linux import SoCLinux
 # Helpers
 # ---------------------------------------------------------------------------------------------------
 
+_CAMEL_RE = re.compile(r'(?<=[a-z])(?=[A-Z])')
+
 def camel_to_snake(name):
-    name = re.sub(r'(?<=[a-z])(?=[A-Z])', '_', name)
-    return name.lower()
+    return _CAMEL_RE.sub('_', name).lower()
 
 def get_board():
     board_classes = {}
     for name, obj in globals().items():
-        name = camel_to_snake(name)
-        if isinstance(obj, type) and issubclass(obj, Board) and obj is not Board:
-            board_classes[name] = obj
+        # Descartar primero lo que no es una placa: sólo éstas pasan por la regex
+        if not isinstance(obj, type) or obj is Board or not issubclass(obj, Board):
+            continue
+        board_classes[camel_to_snake(name)] = obj
     return board_classes
 
 board_classes = get_board()